@@ -0,0 +1,75 @@
+"""
+Micro-batching
+Coalesces concurrent async calls that arrive within a short window into one batched call.
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, List, Optional, Set, Tuple
+
+logger = logging.getLogger("rag-agent.batching")
+
+
+class MicroBatcher:
+    """
+    Collects items submitted within `batch_timeout_ms` (or until `max_batch_size`
+    is reached) and hands them to `handler` as a single list. `handler` must return
+    one result per item, in order; each caller gets its own result back.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[List[Any]], Awaitable[List[Any]]],
+        max_batch_size: int = 16,
+        batch_timeout_ms: float = 5.0,
+        name: str = "batch"
+    ):
+        self._handler = handler
+        self.max_batch_size = max_batch_size
+        self.batch_timeout = batch_timeout_ms / 1000.0
+        self.name = name
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.Task] = None
+        # The event loop only keeps weak references to tasks: hold in-flight batches
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, item: Any) -> Any:
+        """Queue an item and wait for its result."""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+
+        return await future
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.batch_timeout)
+        self._timer = None
+        self._flush()
+
+    def _flush(self):
+        if self._timer is not None and self._timer is not asyncio.current_task():
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future]]):
+        items = [item for item, _ in batch]
+        logger.debug(f"{self.name}: dispatching {len(items)} item(s)")
+        try:
+            results = await self._handler(items)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
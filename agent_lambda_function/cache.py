@@ -0,0 +1,148 @@
+"""
+Query Cache
+In-process LRU+TTL caches for the search tool (survive across warm Lambda invocations).
+"""
+import time
+import hashlib
+from collections import OrderedDict
+from typing import Any, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire after `ttl` seconds."""
+
+    def __init__(self, maxsize: int = 1000, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        timestamp, value = entry
+        if time.monotonic() - timestamp > self.ttl:
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._data[key] = (time.monotonic(), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def vector_hash(vector: Sequence[float]) -> str:
+    """Hash a query vector after int8 quantization, so tiny float jitter maps to the same key."""
+    arr = np.asarray(vector, dtype=np.float32)
+    scale = float(np.abs(arr).max()) or 1.0
+    quantized = np.round(arr / scale * 127).astype(np.int8)
+    return hashlib.blake2b(quantized.tobytes(), digest_size=16).hexdigest()
+
+
+class SemanticCache:
+    """
+    Similarity-aware result cache keyed by the query embedding.
+    Cached query vectors live L2-normalized in one preallocated (maxsize, dim)
+    matrix, so a lookup is a single matrix-vector product; the best match among
+    live entries with the same filter is returned if its cosine >= threshold.
+    """
+
+    def __init__(self, maxsize: int = 512, ttl: float = 300.0, threshold: float = 0.97):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.threshold = threshold
+        self._matrix: Optional[np.ndarray] = None
+        self._filter_ids = np.full(maxsize, -1, dtype=np.int64)
+        self._timestamps = np.zeros(maxsize, dtype=np.float64)
+        self._values: List[Any] = [None] * maxsize
+        self._slot_keys: List[Optional[Hashable]] = [None] * maxsize
+        self._slots: "OrderedDict[Hashable, int]" = OrderedDict()  # key -> slot, LRU order
+        # filter_key -> small int id, refcounted by the slots using it, so keys
+        # leave the index with their last entry (bounded by maxsize)
+        self._filter_index: dict = {}
+        self._filter_refs: dict = {}
+        self._next_fid = 0
+
+    @staticmethod
+    def _normalize(vector: Sequence[float]) -> np.ndarray:
+        arr = np.asarray(vector, dtype=np.float32)
+        return arr / (float(np.linalg.norm(arr)) or 1.0)
+
+    def get(self, vector: Sequence[float], filter_key: Hashable) -> Optional[Any]:
+        fid = self._filter_index.get(filter_key)
+        if self._matrix is None or fid is None:
+            return None
+
+        scores = self._matrix @ self._normalize(vector)
+        live = (self._filter_ids == fid) & (time.monotonic() - self._timestamps <= self.ttl)
+        scores[~live] = -np.inf
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+
+        self._slots.move_to_end(self._slot_keys[best])
+        return self._values[best]
+
+    def set(self, vector: Sequence[float], filter_key: Hashable, value: Any) -> None:
+        query = self._normalize(vector)
+        if self._matrix is None:
+            self._matrix = np.zeros((self.maxsize, query.shape[0]), dtype=np.float32)
+
+        key = (vector_hash(vector), filter_key)
+        slot = self._slots.get(key)
+        if slot is None:
+            if len(self._slots) < self.maxsize:
+                slot = len(self._slots)
+            else:
+                _, slot = self._slots.popitem(last=False)  # evict LRU
+                self._release_filter(self._slot_keys[slot][1], int(self._filter_ids[slot]))
+            self._slots[key] = slot
+            fid = self._acquire_filter(filter_key)
+        else:
+            fid = int(self._filter_ids[slot])
+        self._slots.move_to_end(key)
+
+        self._matrix[slot] = query
+        self._filter_ids[slot] = fid
+        self._timestamps[slot] = time.monotonic()
+        self._values[slot] = value
+        self._slot_keys[slot] = key
+
+    def _acquire_filter(self, filter_key: Hashable) -> int:
+        fid = self._filter_index.get(filter_key)
+        if fid is None:
+            fid = self._filter_index[filter_key] = self._next_fid
+            self._next_fid += 1
+        self._filter_refs[fid] = self._filter_refs.get(fid, 0) + 1
+        return fid
+
+    def _release_filter(self, filter_key: Hashable, fid: int) -> None:
+        refs = self._filter_refs[fid] - 1
+        if refs:
+            self._filter_refs[fid] = refs
+        else:
+            del self._filter_refs[fid]
+            del self._filter_index[filter_key]
+
+    def clear(self) -> None:
+        self._matrix = None
+        self._filter_ids.fill(-1)
+        self._values = [None] * self.maxsize
+        self._slot_keys = [None] * self.maxsize
+        self._slots.clear()
+        self._filter_index.clear()
+        self._filter_refs.clear()
+
+    def __len__(self) -> int:
+        return len(self._slots)
@@ -3,20 +3,31 @@ Medical RAG Agent API - Modular Version
 FastAPI application with LangChain agent for medical Q&A and predictions.
 """
 import os
+import re
+import asyncio
 import logging
-import json
+import time
+import functools
 from contextlib import asynccontextmanager
 from typing import Optional
 
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from mangum import Mangum
 
+# Single-row inference: one OpenMP thread beats fork/join across all vCPUs.
+# Must be set before xgboost (and its OpenMP runtime) is imported in load_xgboost.
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+
 # Third-party imports
+import httpx
+import orjson
 from qdrant_client import AsyncQdrantClient
 from google import genai
-import xgboost as xgb
+from google.genai import types
 from langchain.agents import create_agent
-from langchain_core.messages import HumanMessage
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.utils.function_calling import convert_to_openai_tool
 from langchain_google_genai import ChatGoogleGenerativeAI
 
 # Local imports
@@ -24,9 +35,18 @@ from config import (
     GEMINI_API_KEY,
     QDRANT_HOST,
     QDRANT_PORT,
+    QDRANT_GRPC_PORT,
     QDRANT_API_KEY,
+    QDRANT_TIMEOUT,
+    QDRANT_KEEPALIVE_INTERVAL,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_CONNECT_RETRIES,
     EMBEDDING_MODEL_ID,
+    EMBEDDING_BACKEND,
+    FASTEMBED_MODEL_ID,
     MODEL_ID,
+    PROMPT_CACHE_TTL,
     COLLECTION_NAME,
     VECTOR_SIZE,
     XGBOOST_MODEL_PATH,
@@ -45,6 +65,15 @@ import tool_analytics as tool_module2
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("rag-agent")
 
+# uvloop (optional): faster event loop for the many small awaits per /chat.
+# Must be set before Mangum creates the loop on the first invocation.
+try:
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    logger.info("✓ uvloop event loop policy installed")
+except ImportError:
+    pass
+
 # ------------------------
 # Global Clients
 # ------------------------
@@ -52,88 +81,336 @@ logger = logging.getLogger("rag-agent")
 qdrant_client: Optional[AsyncQdrantClient] = None
 genai_client: Optional[genai.Client] = None
 xgboost_model = None
+embedder = None
+keepalive_task: Optional[asyncio.Task] = None
+patient_data_loaded = False
+gemini_warmed = False
+prompt_cache_name: Optional[str] = None
+prompt_cache_expiry = 0.0
+
+
+def init_clients():
+    """
+    Create the Gemini and Qdrant clients if they don't exist yet.
+    Runs at import time so a warm Lambda container keeps reusing the same
+    connections; lifespan only calls it again as a no-op safeguard.
+    """
+    global qdrant_client, genai_client
+
+    if genai_client is None and GEMINI_API_KEY:
+        limits = httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS
+        )
+        # Explicit httpx transports: a keep-alive pool sized by `limits` that
+        # also retries failed connects (the SDK's own retries cover HTTP errors)
+        genai_client = genai.Client(
+            api_key=GEMINI_API_KEY,
+            http_options=types.HttpOptions(
+                client_args={
+                    "transport": httpx.HTTPTransport(limits=limits, retries=HTTP_CONNECT_RETRIES)
+                },
+                async_client_args={
+                    "transport": httpx.AsyncHTTPTransport(limits=limits, retries=HTTP_CONNECT_RETRIES)
+                }
+            )
+        )
+        logger.info("✓ Gemini Native Client initialized")
+
+    if qdrant_client is None:
+        # gRPC has lower per-call latency than REST for small searches
+        qdrant_client = AsyncQdrantClient(
+            host=QDRANT_HOST,
+            port=QDRANT_PORT,
+            grpc_port=QDRANT_GRPC_PORT,
+            prefer_grpc=True,
+            api_key=QDRANT_API_KEY,
+            timeout=QDRANT_TIMEOUT,
+        )
+        logger.info("✓ Qdrant client created")
+
+
+init_clients()
+
+
+async def qdrant_keepalive(interval: int):
+    """Ping Qdrant periodically so NAT/ALB idle timeouts don't drop the gRPC channel."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await qdrant_client.get_collections()
+        except Exception as e:
+            logger.warning(f"⚠️ Qdrant keepalive failed: {e}")
 
 # ------------------------
 # Agent Configuration
 # ------------------------
 
 
-def get_agent():
-    """Initialize the LangChain agent."""
+def agent_tools() -> list:
+    """Tools exposed to the agent (also declared in the prompt cache)."""
+    return [
+        tool_module.search_medical_records,
+        tool_module.search_medical_records_multi,
+        tool_module.predict_alanine_aminotransferase,
+        tool_module.predict_alt_batch,
+        tool_module2.query_patient_data
+    ]
+
+
+class CachedPromptChat(ChatGoogleGenerativeAI):
+    """
+    Chat model whose system prompt and tool declarations live in a Gemini
+    context cache. Gemini rejects requests that set tools alongside
+    cached_content, so binding tools is a no-op here.
+    """
+
+    def bind_tools(self, tools, tool_choice=None, **kwargs):
+        return self.bind(**kwargs)
+
+
+@functools.lru_cache(maxsize=2)
+def get_agent(cached_content: Optional[str] = None):
+    """
+    Initialize the LangChain agent.
+    Memoized so the LLM client (and its HTTP pool) and the compiled graph
+    are built once per container and reused across invocations.
+    With `cached_content`, the prompt and tools are served from the context cache.
+    """
     if not GEMINI_API_KEY:
         raise ValueError("GEMINI_API_KEY is missing")
 
+    if cached_content:
+        llm = CachedPromptChat(
+            model=MODEL_ID,
+            temperature=0,
+            google_api_key=GEMINI_API_KEY,
+            cached_content=cached_content
+        )
+        return create_agent(model=llm, tools=agent_tools())
+
     llm = ChatGoogleGenerativeAI(
         model=MODEL_ID,
         temperature=0,
         google_api_key=GEMINI_API_KEY
     )
 
-    tools = [
-        tool_module.search_medical_records,
-        tool_module.predict_alanine_aminotransferase,
-        tool_module2.query_patient_data
-    ]
-
     agent_executor = create_agent(
         model=llm,
-        tools=tools,
+        tools=agent_tools(),
         system_prompt=SYSTEM_PROMPT
     )
     
     return agent_executor
 
+
+async def ensure_prompt_cache() -> Optional[str]:
+    """
+    Create (or extend before it expires) the Gemini context cache holding the
+    system prompt and tool declarations. Returns the cache name, or None when
+    disabled or unavailable so callers fall back to the uncached agent.
+    """
+    global prompt_cache_name, prompt_cache_expiry
+
+    if PROMPT_CACHE_TTL <= 0 or genai_client is None:
+        return None
+
+    # Refresh once less than a fifth of the TTL is left
+    if prompt_cache_name and time.time() < prompt_cache_expiry - PROMPT_CACHE_TTL / 5:
+        return prompt_cache_name
+
+    ttl = f"{PROMPT_CACHE_TTL}s"
+    try:
+        if prompt_cache_name:
+            await genai_client.aio.caches.update(
+                name=prompt_cache_name,
+                config=types.UpdateCachedContentConfig(ttl=ttl)
+            )
+        else:
+            declarations = []
+            for t in agent_tools():
+                fn = convert_to_openai_tool(t)["function"]
+                declarations.append(types.FunctionDeclaration(
+                    name=fn["name"],
+                    description=fn.get("description"),
+                    parameters_json_schema=fn.get("parameters")
+                ))
+            cache = await genai_client.aio.caches.create(
+                model=MODEL_ID,
+                config=types.CreateCachedContentConfig(
+                    system_instruction=SYSTEM_PROMPT,
+                    tools=[types.Tool(function_declarations=declarations)],
+                    ttl=ttl
+                )
+            )
+            prompt_cache_name = cache.name
+            logger.info(f"✓ Prompt context cache created: {prompt_cache_name}")
+        prompt_cache_expiry = time.time() + PROMPT_CACHE_TTL
+    except Exception as e:
+        logger.warning(f"⚠️ Prompt cache unavailable, using inline prompt: {e}")
+        prompt_cache_name = None
+        prompt_cache_expiry = 0.0
+
+    return prompt_cache_name
+
+# Messages that are *only* a greeting/thanks/goodbye skip the agent entirely.
+# Anchored at both ends so "hi, what meds is PT-123 on?" still reaches the agent.
+FAST_PATH_RE = re.compile(
+    r"^(?:(hi|hello|hey|good (?:morning|afternoon|evening))|(thanks|thank you|thx|ty)|(bye|goodbye))"
+    r"(?: there| so much| a lot)?[\s!.,:)]*$"
+)
+CANNED_REPLIES = (
+    "Hello! I can search patient medical records, predict ALT levels, "
+    "and compute statistics over the patient population. How can I help?",
+    "You're welcome! Let me know if you need anything else.",
+    "Goodbye! Feel free to come back with any medical questions.",
+)
+
+
+def fast_path_reply(message: str) -> Optional[str]:
+    """Return a canned reply for trivial messages, or None if the agent is needed."""
+    match = FAST_PATH_RE.match(message.strip().lower())
+    if match is None:
+        return None
+    return CANNED_REPLIES[match.lastindex - 1]
+
+
+# Tools whose ToolMessage.artifact is a list of citation dicts
+CITATION_TOOLS = frozenset({"search_medical_records", "search_medical_records_multi"})
+
+
+def _has_malformed_output(result: dict) -> bool:
+    """True if the final AI message is empty or carries unparseable tool-call JSON."""
+    messages = result.get("messages") or []
+    final = messages[-1] if messages else None
+    if not isinstance(final, AIMessage) or not final.content:
+        return True
+    # Earlier turns may include a bad tool call the agent already recovered from
+    return bool(final.invalid_tool_calls)
+
+
+async def invoke_agent(agent, inputs: dict, max_retries: int = 1) -> dict:
+    """Invoke the agent, re-issuing the same request once if its output is malformed."""
+    result = await agent.ainvoke(inputs)
+    for attempt in range(max_retries):
+        if not _has_malformed_output(result):
+            break
+        logger.warning(f"⚠️ Malformed agent output, retrying ({attempt + 1}/{max_retries})")
+        result = await agent.ainvoke(inputs)
+    return result
+
 # ------------------------
 # Application Lifecycle
 # ------------------------
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    """Initialize connections on startup, cleanup on shutdown."""
-    global qdrant_client, genai_client, xgboost_model
-    
-    logger.info("🚀 Initializing Medical RAG Agent...")
-    
-    # Init Gemini Native Client
-    if GEMINI_API_KEY:
-        try:
-            genai_client = genai.Client(api_key=GEMINI_API_KEY)
-            logger.info("✓ Gemini Native Client initialized")
-        except Exception as e:
-            logger.error(f"✗ Gemini Init Failed: {e}")
-            raise
-    else:
-        raise ValueError("GEMINI_API_KEY is required")
-
-    # Init Qdrant
+def load_embedder():
+    """Load the local embedding model (optional, replaces the Gemini embedding round-trip)."""
+    global embedder
+    if EMBEDDING_BACKEND != "fastembed" or embedder is not None:
+        return
     try:
-        qdrant_client = AsyncQdrantClient(
-            host=QDRANT_HOST,
-            port=QDRANT_PORT,
-            api_key=QDRANT_API_KEY,
-        )
-        await qdrant_client.get_collections()
-        logger.info("✓ Connected to Qdrant")
+        from fastembed import TextEmbedding
+        embedder = TextEmbedding(model_name=FASTEMBED_MODEL_ID)
+        logger.info(f"✓ FastEmbed model loaded: {FASTEMBED_MODEL_ID}")
     except Exception as e:
-        logger.error(f"✗ Qdrant Connection Failed: {e}")
+        logger.error(f"✗ Failed to load FastEmbed model: {e}")
         raise
 
-    # Load XGBoost
+
+def load_xgboost():
+    """Load the ALT model (once per container; Mangum re-enters lifespan on every invocation)."""
+    global xgboost_model
+    if xgboost_model is not None:
+        return
     try:
-        xgboost_model = xgb.XGBRegressor()
-        xgboost_model.load_model(XGBOOST_MODEL_PATH)
+        # Imported here (~1 s on a cold container) so it overlaps the other loaders
+        import xgboost as xgb
+
+        # Raw Booster: no sklearn wrapper dispatch, direct C predictor
+        model = xgb.Booster()
+        model.load_model(XGBOOST_MODEL_PATH)
+        # inplace_predict takes a bare float32 array, i.e. features by position only:
+        # refuse a model trained on another column order rather than mispredict
+        expected = list(tool_module.FEATURE_COLUMNS)
+        if model.feature_names is None:
+            model.feature_names = expected
+        elif model.feature_names != expected:
+            raise ValueError(f"Model features {model.feature_names} != {expected}")
+        # Single-row inference: thread-pool fork/join costs more than the tree walk
+        model.set_param({"nthread": 1})
+        # Throwaway prediction: builds the predictor and pages the trees in
+        # during init instead of on the first user's tool call
+        import numpy as np
+        model.inplace_predict(np.zeros((1, len(expected)), dtype=np.float32))
+        xgboost_model = model
         logger.info(f"✓ XGBoost model loaded from {XGBOOST_MODEL_PATH}")
     except Exception as e:
         logger.error(f"✗ Failed to load XGBoost model: {e}")
         raise
-    
-    # Load Patient Data CSV
+
+
+def load_patient_data():
+    """Load the patient CSV for query_patient_data (once per container)."""
+    global patient_data_loaded
+    if patient_data_loaded:
+        return
     try:
         tool_module2.init_patient_data(PATIENT_DATA_CSV_PATH)
+        patient_data_loaded = True
         logger.info(f"✓ Patient data loaded from {PATIENT_DATA_CSV_PATH}")
     except Exception as e:
         logger.error(f"✗ Failed to load patient data: {e}")
         raise
+
+
+async def warm_gemini_connection():
+    """Open the async Gemini connection (DNS + TLS) during init, once per container."""
+    global gemini_warmed
+    if gemini_warmed or EMBEDDING_BACKEND == "fastembed":
+        return
+    gemini_warmed = True
+    try:
+        # Model metadata lookup: same host as embed_content, no embedding quota used
+        await genai_client.aio.models.get(model=EMBEDDING_MODEL_ID)
+    except Exception as e:
+        logger.warning(f"⚠️ Gemini warmup failed: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize connections and models on startup (idempotent across invocations)."""
+    global keepalive_task
+    
+    logger.info("🚀 Initializing Medical RAG Agent...")
+    
+    if not GEMINI_API_KEY:
+        raise ValueError("GEMINI_API_KEY is required")
+
+    # Clients are created at import time; this is a no-op on warm invocations.
+    # Qdrant connectivity is not probed here (saves a round-trip per cold start),
+    # /health checks it on demand.
+    try:
+        init_clients()
+    except Exception as e:
+        logger.error(f"✗ Client Init Failed: {e}")
+        raise
+
+    # One keepalive loop per container (it only runs while the container is thawed)
+    if QDRANT_KEEPALIVE_INTERVAL > 0 and (keepalive_task is None or keepalive_task.done()):
+        keepalive_task = asyncio.create_task(qdrant_keepalive(QDRANT_KEEPALIVE_INTERVAL))
+
+    # Independent cold-start work runs concurrently: model/CSV reads happen on
+    # worker threads and overlap each other and the prompt-cache/warmup round-trips.
+    # Each loader is a no-op once its resource exists (warm invocations).
+    _, _, _, prompt_cache, _ = await asyncio.gather(
+        asyncio.to_thread(load_embedder),
+        asyncio.to_thread(load_xgboost),
+        asyncio.to_thread(load_patient_data),
+        ensure_prompt_cache(),
+        warm_gemini_connection()
+    )
+    app.state.xgb_model = xgboost_model
+    app.state.prompt_cache = prompt_cache
     
     # Initialize tools with dependencies
     tool_module.init_tools(
@@ -144,18 +421,20 @@ async def lifespan(app: FastAPI):
             'EMBEDDING_MODEL_ID': EMBEDDING_MODEL_ID,
             'VECTOR_SIZE': VECTOR_SIZE,
             'COLLECTION_NAME': COLLECTION_NAME
-        }
+        },
+        embedder=embedder
     )
+
+    # Build the agent once; get_agent() is memoized so warm invocations reuse it
+    app.state.agent = get_agent(prompt_cache)
     
     logger.info("✓ All services initialized successfully")
 
     yield
 
-    # Cleanup
-    logger.info("🛑 Shutting down...")
-    if qdrant_client:
-        await qdrant_client.close()
-        logger.info("✓ Qdrant connection closed")
+    # Clients are intentionally kept open: they are module-level and reused
+    # by the next invocation of this container.
+    logger.info("🛑 Invocation finished")
 
 # ------------------------
 # FastAPI Application
@@ -165,6 +444,7 @@ app = FastAPI(
     title="Medical RAG Agent",
     description="AI-powered medical assistant with RAG and predictive capabilities",
     version="2.0.0",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -172,6 +452,15 @@ app = FastAPI(
 # API Endpoints
 # ------------------------
 
+def current_agent():
+    """Return the compiled agent built in lifespan (memoized get_agent() as fallback)."""
+    try:
+        return getattr(app.state, "agent", None) or get_agent()
+    except Exception as e:
+        logger.error(f"Failed to initialize agent: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Agent initialization failed: {str(e)}")
+
+
 @app.get("/")
 async def root():
     """Health check endpoint."""
@@ -185,23 +474,34 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Detailed health check with service status."""
+    qdrant_ok = False
+    if qdrant_client:
+        try:
+            await qdrant_client.get_collections()
+            qdrant_ok = True
+        except Exception as e:
+            logger.warning(f"Qdrant health check failed: {e}")
+
     return {
-        "status": "healthy",
+        "status": "healthy" if qdrant_ok else "degraded",
         "services": {
-            "qdrant": "connected" if qdrant_client else "disconnected",
+            "qdrant": "connected" if qdrant_ok else "disconnected",
             "genai": "connected" if genai_client else "disconnected",
-            "xgboost": "loaded" if xgboost_model else "not loaded"
+            "xgboost": "loaded" if xgboost_model else "not loaded",
+            "prompt_cache": prompt_cache_name or "disabled"
         }
     }
 
 
-@app.post("/chat", response_model=ChatResponse)
-async def chat_endpoint(request: ChatRequest):
+@app.post("/chat", response_model=ChatResponse, response_model_exclude_none=True)
+async def chat_endpoint(request: ChatRequest, stream: bool = False):
     """
     Main chat endpoint for interacting with the medical AI agent.
     
     Args:
         request: ChatRequest with user message
+        stream: If true, answer as Server-Sent Events (tokens as they are
+            generated, then a final event with tool calls and citations)
         
     Returns:
         ChatResponse with agent's reply, tool calls, and citations
@@ -209,24 +509,30 @@ async def chat_endpoint(request: ChatRequest):
     Raises:
         HTTPException: If services not initialized or agent error
     """
+    # Greetings/thanks don't need a tool or an LLM round-trip
+    canned = fast_path_reply(request.message)
+    if canned is not None:
+        if stream:
+            events = (_sse({"type": "token", "text": canned}), _sse({"type": "done", "tool_calls": [], "citations": []}))
+            return StreamingResponse(iter(events), media_type="text/event-stream", headers=SSE_HEADERS)
+        return ChatResponse(response=canned)
+
     # Verify services are initialized
     if not qdrant_client or not genai_client:
         raise HTTPException(status_code=503, detail="Services not initialized")
 
-    # Get agent
-    try:
-        agent = get_agent()
-    except Exception as e:
-        logger.error(f"Failed to initialize agent: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Agent initialization failed: {str(e)}")
+    agent = current_agent()
 
     # Prepare input
-    inputs = {"messages": [HumanMessage(content=request.message)]}
+    inputs = {"messages": [("human", request.message)]}
+
+    if stream:
+        return StreamingResponse(agent_sse(agent, inputs), media_type="text/event-stream", headers=SSE_HEADERS)
     
     try:
-        # Invoke agent (using your working pattern)
+        # Invoke agent (retries once on malformed tool-call output)
         logger.info(f"💬 Processing: {request.message[:80]}...")
-        result = await agent.ainvoke(inputs)
+        result = await invoke_agent(agent, inputs)
         
         logger.info(f"✓ Agent completed with {len(result['messages'])} messages")
         
@@ -248,17 +554,11 @@ async def chat_endpoint(request: ChatRequest):
                     tool_usage.append(t['name'])
                     logger.info(f"🔧 Tool used: {t['name']}")
             
-            # Extract citations from search_medical_records responses
-            if hasattr(msg, 'content') and isinstance(msg.content, str):
-                try:
-                    # Try to parse JSON from tool responses
-                    content_json = json.loads(msg.content)
-                    if 'citations' in content_json and content_json['citations']:
-                        for citation_data in content_json['citations']:
-                            citations.append(Citation(**citation_data))
-                        logger.info(f"📚 Extracted {len(content_json['citations'])} citation(s) from {len(set(c['file_name'] for c in content_json['citations']))} document(s)")
-                except (json.JSONDecodeError, TypeError, KeyError):
-                    pass  # Not a JSON response or no citations
+            # Citations ride on the search tools' ToolMessage artifact
+            if isinstance(msg, ToolMessage) and msg.name in CITATION_TOOLS and msg.artifact:
+                # Built by our own tool with the exact field set: skip re-validation
+                citations.extend(Citation.model_construct(**c) for c in msg.artifact)
+                logger.info(f"📚 Extracted {len(msg.artifact)} citation(s)")
 
         return ChatResponse(
             response=str(final_message),
@@ -270,6 +570,63 @@ async def chat_endpoint(request: ChatRequest):
         logger.error(f"Agent error: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+def _chunk_text(content) -> str:
+    """Extract text from a streamed chunk (Gemini may send a list of parts)."""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(
+            part.get("text", "") if isinstance(part, dict) else str(part)
+            for part in content
+        )
+    return ""
+
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def _sse(payload: dict) -> bytes:
+    """Frame one Server-Sent Event."""
+    return b"data: " + orjson.dumps(payload) + b"\n\n"
+
+
+async def agent_sse(agent, inputs: dict):
+    """Run the agent via astream_events and yield token/tool/done SSE frames."""
+    tool_usage = []
+    citations = []
+    try:
+        async for event in agent.astream_events(inputs, version="v2"):
+            kind = event["event"]
+            if kind == "on_chat_model_stream":
+                text = _chunk_text(event["data"]["chunk"].content)
+                if text:
+                    yield _sse({"type": "token", "text": text})
+            elif kind == "on_tool_start":
+                tool_usage.append(event["name"])
+                yield _sse({"type": "tool", "name": event["name"]})
+            elif kind == "on_tool_end" and event["name"] in CITATION_TOOLS:
+                artifact = getattr(event["data"].get("output"), "artifact", None)
+                if artifact:
+                    citations.extend(artifact)
+    except Exception as e:
+        logger.error(f"Streaming agent error: {e}", exc_info=True)
+        yield _sse({"type": "error", "detail": str(e)})
+        return
+
+    yield _sse({"type": "done", "tool_calls": tool_usage, "citations": citations})
+
+
+@app.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    """
+    Alias for /chat?stream=true (Server-Sent Events).
+    
+    Note: Mangum buffers the whole response behind API Gateway / Function URLs,
+    so streaming only reduces time-to-first-byte when served by a streaming-capable
+    server (e.g. uvicorn). Use /chat for the Lambda deployment.
+    """
+    return await chat_endpoint(request, stream=True)
+
 # ------------------------
 # AWS Lambda Handler
 # ------------------------
@@ -0,0 +1,24 @@
+"""
+Categorical Mappings
+Label <-> code tables shared by the prediction and analytics tools (read-only).
+"""
+from types import MappingProxyType
+
+# Forward mappings: tool label -> encoded value in the dataset / model features
+MAPPINGS = MappingProxyType({
+    'sex': MappingProxyType({'Female': 0, 'Male': 1}),
+    'smoker': MappingProxyType({'No': 0, 'Yes': 1}),
+    'diagnosis_code': MappingProxyType({'D1': 1, 'D2': 2, 'D3': 3, 'D4': 4, 'D5': 5}),
+    'exercise_frequency': MappingProxyType({'Low': 0, 'Moderate': 1, 'High': 2}),
+    'diet_quality': MappingProxyType({'Poor': 0, 'Average': 1, 'Good': 2}),
+    'income_bracket': MappingProxyType({'Low': 0, 'Middle': 1, 'High': 2}),
+    'education_level': MappingProxyType({'Primary': 0, 'Secondary': 1, 'Tertiary': 2}),
+    'urban': MappingProxyType({'No': 0, 'Yes': 1}),
+    'readmitted': MappingProxyType({'No': 0, 'Yes': 1}),
+})
+
+# Reverse mappings (for display purposes)
+REVERSE_MAPPINGS = MappingProxyType({
+    field: MappingProxyType({code: label for label, code in labels.items()})
+    for field, labels in MAPPINGS.items()
+})
@@ -3,19 +3,21 @@ API Models
 Pydantic models for request/response validation.
 """
 from typing import List, Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class ChatRequest(BaseModel):
     """Request model for chat endpoint."""
     message: str = Field(..., description="User message to send to the agent")
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        extra="ignore",
+        json_schema_extra={
             "example": {
                 "message": "What are the symptoms for patient PT-12345?"
             }
         }
+    )
 
 
 class Citation(BaseModel):
@@ -27,8 +29,9 @@ class Citation(BaseModel):
     clinician_id: Optional[str] = Field(..., description="Associated clinician ID")
     score: Optional[float] = Field(None, description="Relevance score (0-1)")
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        extra="ignore",
+        json_schema_extra={
             "example": {
                 "id": 1,
                 "file_name": "discharge_summary.pdf",
@@ -38,6 +41,7 @@ class Citation(BaseModel):
                 "score": 0.89
             }
         }
+    )
 
 
 class ChatResponse(BaseModel):
@@ -46,8 +50,9 @@ class ChatResponse(BaseModel):
     tool_calls: List[str] = Field(default=[], description="List of tools used")
     citations: List[Citation] = Field(default=[], description="Source citations")
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        extra="ignore",
+        json_schema_extra={
             "example": {
                 "response": "Based on the discharge summary [1], the patient...",
                 "tool_calls": ["search_medical_records"],
@@ -62,4 +67,5 @@ class ChatResponse(BaseModel):
                     }
                 ]
             }
-        }
\ No newline at end of file
+        }
+    )
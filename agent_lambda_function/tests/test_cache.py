@@ -0,0 +1,18 @@
+import numpy as np
+
+from cache import SemanticCache
+
+
+def test_semantic_cache_filter_index_stays_bounded():
+    cache = SemanticCache(maxsize=4, ttl=300, threshold=0.99)
+    rng = np.random.default_rng(0)
+    for i in range(200):
+        vector = rng.standard_normal(8).astype(np.float32)
+        filter_key = (None, None, (f"PT-{i}",))
+        cache.set(vector, filter_key, i)
+        assert cache.get(vector, filter_key) == i
+        assert cache.get(vector, (None, None, ("PT-other",))) is None
+
+    # Only the filters of the 4 live entries remain indexed
+    assert len(cache._filter_index) == 4
+    assert set(cache._filter_index) == {(None, None, (f"PT-{i}",)) for i in range(196, 200)}
@@ -2,40 +2,84 @@
 Patient Data Analytics Tool
 Queries the patient dataset CSV to answer analytical questions.
 """
-import pandas as pd
+import csv
+import numpy as np
 import logging
-from typing import Optional, Literal
+from functools import lru_cache
+from typing import Dict, Optional, Literal, Tuple
 from langchain_core.tools import tool
 
+from mappings import MAPPINGS, REVERSE_MAPPINGS
+
 logger = logging.getLogger("rag-agent.tools.analytics")
 
-# Global dataset (loaded once during initialization)
-_patient_data: Optional[pd.DataFrame] = None
-
-# Reverse mappings (for display purposes)
-REVERSE_MAPPINGS = {
-    'sex': {0: 'Female', 1: 'Male'},
-    'smoker': {0: 'No', 1: 'Yes'},
-    'diagnosis_code': {1.0: 'D1', 2.0: 'D2', 3.0: 'D3', 4.0: 'D4', 5.0: 'D5'},
-    'exercise_frequency': {0.0: 'Low', 1.0: 'Moderate', 2.0: 'High'},
-    'diet_quality': {0.0: 'Poor', 1.0: 'Average', 2.0: 'Good'},
-    'income_bracket': {0.0: 'Low', 1.0: 'Middle', 2.0: 'High'},
-    'education_level': {0.0: 'Primary', 1.0: 'Secondary', 2.0: 'Tertiary'},
-    'urban': {0.0: 'No', 1.0: 'Yes'},
-    'readmitted': {0.0: 'No', 1.0: 'Yes'}
+QUERY_CACHE_MAXSIZE = 1024
+
+# Row count of the loaded dataset (None until initialization)
+_num_rows: Optional[int] = None
+
+FILTER_COLUMNS = (
+    'sex', 'smoker', 'diagnosis_code', 'readmitted', 'exercise_frequency',
+    'diet_quality', 'income_bracket', 'education_level', 'urban',
+    'age', 'bmi', 'medication_count', 'days_hospitalized',
+)
+AGGREGATE_COLUMNS = ('alanine_aminotransferase', 'last_lab_glucose')
+
+
+class _Cols:
+    """Contiguous typed NumPy arrays of the columns the tool touches (one per slot)."""
+    __slots__ = FILTER_COLUMNS + AGGREGATE_COLUMNS
+
+
+_cols = _Cols()
+
+# Precomputed boolean mask per (categorical column, label); a categorical
+# filter is then a lookup plus one AND instead of a comparison pass
+_value_masks: Dict[str, Dict[str, np.ndarray]] = {}
+
+GROUP_COLUMNS = (
+    'sex', 'diagnosis_code', 'smoker', 'readmitted', 'exercise_frequency', 'diet_quality', 'urban',
+)
+# group_by column -> (row order sorted by code, segment starts, segment ends, codes)
+_group_index: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray, list]] = {}
+# group_by column -> per-group row counts ('count') and column sums, precomputed
+# so unfiltered grouped count/sum/mean queries cost O(groups) instead of O(N)
+_group_totals: Dict[str, Dict[str, np.ndarray]] = {}
+SUMMED_COLUMNS = (
+    'age', 'bmi', 'alanine_aminotransferase', 'last_lab_glucose',
+    'medication_count', 'days_hospitalized',
+)
+
+# aggregation -> (column, reduction, ungrouped result message); looked up once
+# per query instead of walking an if/elif ladder per branch
+AGGREGATIONS = {
+    'count': (None, 'count', "Found {} patients matching the criteria."),
+    'mean_age': ('age', 'mean', "Average age: {:.2f} years"),
+    'mean_bmi': ('bmi', 'mean', "Average BMI: {:.2f}"),
+    'mean_alt': ('alanine_aminotransferase', 'mean', "Average ALT: {:.2f} U/L"),
+    'mean_glucose': ('last_lab_glucose', 'mean', "Average glucose: {:.2f}"),
+    'sum_medications': ('medication_count', 'sum', "Total medications: {}"),
+    'sum_days_hospitalized': ('days_hospitalized', 'sum', "Total hospital days: {}"),
+    'max_age': ('age', 'max', "Maximum age: {:.0f} years"),
+    'min_age': ('age', 'min', "Minimum age: {:.0f} years"),
+    'max_bmi': ('bmi', 'max', "Maximum BMI: {:.2f}"),
+    'min_bmi': ('bmi', 'min', "Minimum BMI: {:.2f}"),
+    'max_alt': ('alanine_aminotransferase', 'max', "Maximum ALT: {:.2f} U/L"),
+    'min_alt': ('alanine_aminotransferase', 'min', "Minimum ALT: {:.2f} U/L"),
 }
 
-# Forward mappings (same as prediction tool)
-MAPPINGS = {
-    'sex': {'Female': 0, 'Male': 1},
-    'smoker': {'No': 0, 'Yes': 1},
-    'diagnosis_code': {'D1': 1.0, 'D2': 2.0, 'D3': 3.0, 'D4': 4.0, 'D5': 5.0},
-    'exercise_frequency': {'Low': 0.0, 'Moderate': 1.0, 'High': 2.0},
-    'diet_quality': {'Poor': 0.0, 'Average': 1.0, 'Good': 2.0},
-    'income_bracket': {'Low': 0.0, 'Middle': 1.0, 'High': 2.0},
-    'education_level': {'Primary': 0.0, 'Secondary': 1.0, 'Tertiary': 2.0},
-    'urban': {'No': 0.0, 'Yes': 1.0},
-    'readmitted': {'No': 0.0, 'Yes': 1.0}
+# Narrow dtypes for the low-cardinality columns (2-5 codes, small counts).
+# exercise_frequency and education_level have missing values, so they stay
+# floating point (float32 keeps NaN) instead of int8.
+CSV_DTYPES = {
+    'sex': 'int8', 'smoker': 'int8', 'diagnosis_code': 'int8',
+    'diet_quality': 'int8', 'income_bracket': 'int8', 'urban': 'int8',
+    'readmitted': 'int8', 'medication_count': 'int16', 'days_hospitalized': 'int16',
+    'exercise_frequency': 'float32', 'education_level': 'float32',
+    # Reported measures stay float64: in float32 a stored 25.085 becomes
+    # 25.08499..., which prints as 25.08 instead of 25.09
+    'age': 'int16', 'bmi': 'float64',
+    'alanine_aminotransferase': 'float64', 'last_lab_glucose': 'float64',
 }
 
 
@@ -44,15 +88,74 @@ def init_patient_data(csv_path: str):
     Load the patient dataset CSV into memory.
     Called during application startup.
     """
-    global _patient_data
+    global _num_rows
     try:
-        _patient_data = pd.read_csv(csv_path)
-        logger.info(f"✓ Loaded patient dataset: {len(_patient_data)} records, {len(_patient_data.columns)} columns")
+        columns = _read_csv_columns(csv_path, _Cols.__slots__)
+        for name, values in columns.items():
+            setattr(_cols, name, values)
+        _value_masks.clear()
+        _value_masks.update({
+            column: {label: getattr(_cols, column) == code for label, code in codes.items()}
+            for column, codes in MAPPINGS.items()
+        })
+        _group_index.clear()
+        _group_index.update({column: _build_group_index(getattr(_cols, column)) for column in GROUP_COLUMNS})
+        _group_totals.clear()
+        _group_totals.update({column: _build_group_totals(_group_index[column]) for column in GROUP_COLUMNS})
+        _query_patient_data.cache_clear()
+        _num_rows = len(_cols.age)
+        logger.info(f"✓ Loaded patient dataset: {_num_rows} records, {len(columns)} columns")
     except Exception as e:
         logger.error(f"✗ Failed to load patient dataset: {e}")
         raise
 
 
+def _read_csv_columns(csv_path: str, names) -> Dict[str, np.ndarray]:
+    """
+    Parse the named CSV columns into arrays of their CSV_DTYPES dtype.
+    Plain csv + NumPy keeps pandas (~250 ms of imports) off the cold start.
+    Empty fields become NaN, which only floating-point columns may hold.
+    """
+    with open(csv_path, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        positions = [header.index(name) for name in names]
+        fields = list(zip(*reader))
+
+    columns = {}
+    for name, position in zip(names, positions):
+        values = np.array([value or "nan" for value in fields[position]], dtype=np.float64)
+        dtype = np.dtype(CSV_DTYPES.get(name, np.float64))
+        if dtype.kind != 'f' and np.isnan(values).any():
+            raise ValueError(f"Column '{name}' has missing values but dtype {dtype}")
+        columns[name] = values.astype(dtype)
+    return columns
+
+
+def _build_group_index(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, list]:
+    """Stable row order sorted by group code, plus each code's [start, end) segment (NaN rows dropped)."""
+    order = np.argsort(values, kind='stable')
+    sorted_values = values[order]
+    if values.dtype.kind == 'f':
+        keep = ~np.isnan(sorted_values)
+        order, sorted_values = order[keep], sorted_values[keep]
+    uniques = np.unique(sorted_values)
+    starts = np.searchsorted(sorted_values, uniques, side='left')
+    ends = np.searchsorted(sorted_values, uniques, side='right')
+    return order, starts, ends, [value.item() for value in uniques]
+
+
+def _build_group_totals(group_index) -> Dict[str, np.ndarray]:
+    """Row count and per-column sums of every group segment (one reduceat per column)."""
+    order, starts, ends, _ = group_index
+    totals = {'count': ends - starts}
+    for column in SUMMED_COLUMNS:
+        values = getattr(_cols, column)[order]
+        dtype = np.float64 if values.dtype.kind == 'f' else np.int64
+        totals[column] = np.add.reduceat(values, starts, dtype=dtype)
+    return totals
+
+
 @tool
 def query_patient_data(
     # Categorical filters (using Literal for type safety)
@@ -141,142 +244,171 @@ def query_patient_data(
         # Count by gender?
         query_patient_data(aggregation="count", group_by="sex")
     """
-    if _patient_data is None:
+    if _num_rows is None:
         return "Error: Patient dataset not loaded."
     
     try:
-        df = _patient_data.copy()
-        
-        # Apply categorical filters
-        if sex is not None:
-            df = df[df['sex'] == MAPPINGS['sex'][sex]]
-        if smoker is not None:
-            df = df[df['smoker'] == MAPPINGS['smoker'][smoker]]
-        if diagnosis_code is not None:
-            df = df[df['diagnosis_code'] == MAPPINGS['diagnosis_code'][diagnosis_code]]
-        if readmitted is not None:
-            df = df[df['readmitted'] == MAPPINGS['readmitted'][readmitted]]
-        if exercise_frequency is not None:
-            df = df[df['exercise_frequency'] == MAPPINGS['exercise_frequency'][exercise_frequency]]
-        if diet_quality is not None:
-            df = df[df['diet_quality'] == MAPPINGS['diet_quality'][diet_quality]]
-        if income_bracket is not None:
-            df = df[df['income_bracket'] == MAPPINGS['income_bracket'][income_bracket]]
-        if education_level is not None:
-            df = df[df['education_level'] == MAPPINGS['education_level'][education_level]]
-        if urban is not None:
-            df = df[df['urban'] == MAPPINGS['urban'][urban]]
-        
-        # Apply numeric filters
-        if age_min is not None:
-            df = df[df['age'] >= age_min]
-        if age_max is not None:
-            df = df[df['age'] <= age_max]
-        if bmi_min is not None:
-            df = df[df['bmi'] >= bmi_min]
-        if bmi_max is not None:
-            df = df[df['bmi'] <= bmi_max]
-        if medication_count_min is not None:
-            df = df[df['medication_count'] >= medication_count_min]
-        if medication_count_max is not None:
-            df = df[df['medication_count'] <= medication_count_max]
-        if days_hospitalized_min is not None:
-            df = df[df['days_hospitalized'] >= days_hospitalized_min]
-        if days_hospitalized_max is not None:
-            df = df[df['days_hospitalized'] <= days_hospitalized_max]
-        
-        logger.info(f"🔍 Filtered to {len(df)} records")
-        
-        # If no records match
-        if len(df) == 0:
-            return "No patients found matching the specified criteria."
-        
-        # Perform aggregation
-        result = _perform_aggregation(df, aggregation, group_by)
-        return result
-    
+        return _query_patient_data(
+            sex, smoker, diagnosis_code, readmitted, exercise_frequency, diet_quality,
+            income_bracket, education_level, urban,
+            age_min, age_max, bmi_min, bmi_max, medication_count_min, medication_count_max,
+            days_hospitalized_min, days_hospitalized_max,
+            aggregation, group_by,
+        )
     except Exception as e:
         logger.error(f"Query error: {e}", exc_info=True)
         return f"Error processing query: {str(e)}"
 
 
-def _perform_aggregation(df: pd.DataFrame, aggregation: str, group_by: Optional[str] = None) -> str:
-    """Perform aggregation on the dataframe."""
-    
-    # Group by if specified
-    if group_by:
-        if aggregation == 'count':
-            grouped = df.groupby(group_by).size()
-        elif aggregation == 'mean_age':
-            grouped = df.groupby(group_by)['age'].mean()
-        elif aggregation == 'mean_bmi':
-            grouped = df.groupby(group_by)['bmi'].mean()
-        elif aggregation == 'mean_alt':
-            grouped = df.groupby(group_by)['alanine_aminotransferase'].mean()
-        elif aggregation == 'mean_glucose':
-            grouped = df.groupby(group_by)['last_lab_glucose'].mean()
-        elif aggregation == 'sum_medications':
-            grouped = df.groupby(group_by)['medication_count'].sum()
-        elif aggregation == 'sum_days_hospitalized':
-            grouped = df.groupby(group_by)['days_hospitalized'].sum()
-        elif aggregation == 'max_age':
-            grouped = df.groupby(group_by)['age'].max()
-        elif aggregation == 'min_age':
-            grouped = df.groupby(group_by)['age'].min()
-        elif aggregation == 'max_bmi':
-            grouped = df.groupby(group_by)['bmi'].max()
-        elif aggregation == 'min_bmi':
-            grouped = df.groupby(group_by)['bmi'].min()
-        elif aggregation == 'max_alt':
-            grouped = df.groupby(group_by)['alanine_aminotransferase'].max()
-        elif aggregation == 'min_alt':
-            grouped = df.groupby(group_by)['alanine_aminotransferase'].min()
+# Agents repeat the same filter/aggregation combinations across turns; the
+# dataset is read-only after load, so results are memoized on the arguments
+@lru_cache(maxsize=QUERY_CACHE_MAXSIZE)
+def _query_patient_data(
+    sex, smoker, diagnosis_code, readmitted, exercise_frequency, diet_quality,
+    income_bracket, education_level, urban,
+    age_min, age_max, bmi_min, bmi_max, medication_count_min, medication_count_max,
+    days_hospitalized_min, days_hospitalized_max,
+    aggregation, group_by,
+) -> str:
+    """Filter and aggregate the loaded dataset (uncached body of query_patient_data)."""
+    mask = None
+
+    # Apply categorical filters
+    for column, label in (
+        ('sex', sex), ('smoker', smoker), ('diagnosis_code', diagnosis_code),
+        ('readmitted', readmitted), ('exercise_frequency', exercise_frequency),
+        ('diet_quality', diet_quality), ('income_bracket', income_bracket),
+        ('education_level', education_level), ('urban', urban),
+    ):
+        if label is not None:
+            mask = _and_mask(mask, _value_masks[column][label])
+
+    # Apply numeric filters; each comparison is written into one reused
+    # scratch buffer, so k range bounds cost no per-filter temporaries
+    scratch = None
+    for column, op, bound in (
+        ('age', np.greater_equal, age_min), ('age', np.less_equal, age_max),
+        ('bmi', np.greater_equal, bmi_min), ('bmi', np.less_equal, bmi_max),
+        ('medication_count', np.greater_equal, medication_count_min),
+        ('medication_count', np.less_equal, medication_count_max),
+        ('days_hospitalized', np.greater_equal, days_hospitalized_min),
+        ('days_hospitalized', np.less_equal, days_hospitalized_max),
+    ):
+        if bound is None:
+            continue
+        values = getattr(_cols, column)
+        if values.dtype.kind == 'f':
+            # Compare in the column's precision (bmi >= 25.3 must match a stored 25.3)
+            bound = values.dtype.type(bound)
+        if mask is None:
+            mask = op(values, bound)
         else:
-            return f"Error: Unknown aggregation '{aggregation}'."
-        
-        # Format results with readable labels
-        results = []
-        for value, result in grouped.items():
-            # Convert encoded value back to label
-            if group_by in REVERSE_MAPPINGS and value in REVERSE_MAPPINGS[group_by]:
-                label = REVERSE_MAPPINGS[group_by][value]
-            else:
-                label = str(value)
-            
-            if aggregation == 'count':
-                results.append(f"{label}: {result} patients")
-            else:
-                results.append(f"{label}: {result:.2f}")
-        
-        return ", ".join(results)
+            if scratch is None:
+                scratch = np.empty_like(mask)
+            mask = _and_mask(mask, op(values, bound, out=scratch))
+
+    # The filtered frame is never materialized for scalar aggregations:
+    # they reduce the raw column arrays under the mask directly
+    n = _num_rows if mask is None else int(np.count_nonzero(mask))
+
+    logger.info(f"🔍 Filtered to {n} records")
+    
+    # If no records match
+    if n == 0:
+        return "No patients found matching the specified criteria."
     
+    # Perform aggregation
+    result = _perform_aggregation(mask, n, aggregation, group_by)
+    return result
+
+
+def _and_mask(mask: Optional[np.ndarray], condition: np.ndarray) -> np.ndarray:
+    """AND a condition into the running mask, in place (never writes into `condition`)."""
+    if mask is None:
+        return condition.copy()
+    return np.logical_and(mask, condition, out=mask)
+
+
+def _grouped_scan(mask: Optional[np.ndarray], column: Optional[str], reducer,
+                  order, starts, ends, codes) -> list:
+    """Reduce each group's masked rows (count them if no column); (code, result) per observed group."""
+    values = getattr(_cols, column) if column else None
+    grouped = []
+    for code, start, end in zip(codes, starts, ends):
+        rows = order[start:end]
+        if mask is not None:
+            rows = rows[mask[rows]]
+        if len(rows) == 0:
+            continue  # like groupby, only observed groups are reported
+        result = len(rows) if values is None else reducer(values[rows])
+        grouped.append((code, result))
+    return grouped
+
+
+def _masked_sum(values: np.ndarray, mask: Optional[np.ndarray]):
+    """Sum of `values` over the rows selected by `mask` (None = all rows)."""
+    if mask is None:
+        return values.sum(dtype=np.float64 if values.dtype.kind == 'f' else np.int64)
+    if values.dtype.kind == 'f':
+        # BLAS dot against the 0/1 mask: one streaming pass, no filtered copy
+        return float(np.dot(values, mask.astype(values.dtype)))
+    return values[mask].sum(dtype=np.int64)  # exact integer totals
+
+
+# reduction -> kernel(values, mask, n) over the masked rows (mask None = all rows).
+# min/max gather the selected rows: faster than a where= reduction at any selectivity.
+_SCALAR_KERNELS = {
+    'mean': lambda values, mask, n: _masked_sum(values, mask) / n,
+    'sum': lambda values, mask, n: _masked_sum(values, mask),
+    'max': lambda values, mask, n: (values if mask is None else values[mask]).max(),
+    'min': lambda values, mask, n: (values if mask is None else values[mask]).min(),
+}
+
+# reduction -> reducer over one group's gathered values
+_GROUP_REDUCERS = {'mean': np.mean, 'sum': np.sum, 'max': np.max, 'min': np.min}
+
+
+def _perform_aggregation(mask: Optional[np.ndarray], n: int, aggregation: str,
+                         group_by: Optional[str] = None) -> str:
+    """Perform aggregation over the `n` rows selected by `mask` (None = all rows)."""
+    spec = AGGREGATIONS.get(aggregation)
+    if spec is None:
+        return f"Error: Unknown aggregation '{aggregation}'."
+    column, reduction, message = spec
+
     # No grouping - single aggregation
+    if not group_by:
+        if reduction == 'count':
+            return message.format(n)
+        return message.format(_SCALAR_KERNELS[reduction](getattr(_cols, column), mask, n))
+
+    # Walk the precomputed per-group row segments instead of hashing the key column
+    order, starts, ends, codes = _group_index[group_by]
+    if mask is None and reduction in ('count', 'sum', 'mean'):
+        # Unfiltered: answer from the precomputed group totals
+        totals = _group_totals[group_by]
+        if reduction == 'count':
+            results = totals['count']
+        elif reduction == 'sum':
+            results = totals[column]
+        else:
+            results = totals[column] / totals['count']
+        grouped = list(zip(codes, results.tolist()))
     else:
-        if aggregation == 'count':
-            return f"Found {len(df)} patients matching the criteria."
-        elif aggregation == 'mean_age':
-            return f"Average age: {df['age'].mean():.2f} years"
-        elif aggregation == 'mean_bmi':
-            return f"Average BMI: {df['bmi'].mean():.2f}"
-        elif aggregation == 'mean_alt':
-            return f"Average ALT: {df['alanine_aminotransferase'].mean():.2f} U/L"
-        elif aggregation == 'mean_glucose':
-            return f"Average glucose: {df['last_lab_glucose'].mean():.2f}"
-        elif aggregation == 'sum_medications':
-            return f"Total medications: {df['medication_count'].sum()}"
-        elif aggregation == 'sum_days_hospitalized':
-            return f"Total hospital days: {df['days_hospitalized'].sum()}"
-        elif aggregation == 'max_age':
-            return f"Maximum age: {df['age'].max():.0f} years"
-        elif aggregation == 'min_age':
-            return f"Minimum age: {df['age'].min():.0f} years"
-        elif aggregation == 'max_bmi':
-            return f"Maximum BMI: {df['bmi'].max():.2f}"
-        elif aggregation == 'min_bmi':
-            return f"Minimum BMI: {df['bmi'].min():.2f}"
-        elif aggregation == 'max_alt':
-            return f"Maximum ALT: {df['alanine_aminotransferase'].max():.2f} U/L"
-        elif aggregation == 'min_alt':
-            return f"Minimum ALT: {df['alanine_aminotransferase'].min():.2f} U/L"
+        grouped = _grouped_scan(mask, column, _GROUP_REDUCERS.get(reduction), order, starts, ends, codes)
+
+    # Format results with readable labels
+    results = []
+    for value, result in grouped:
+        # Convert encoded value back to label
+        if group_by in REVERSE_MAPPINGS and value in REVERSE_MAPPINGS[group_by]:
+            label = REVERSE_MAPPINGS[group_by][value]
         else:
-            return f"Error: Unknown aggregation '{aggregation}'."
\ No newline at end of file
+            label = str(value)
+
+        if reduction == 'count':
+            results.append(f"{label}: {result} patients")
+        else:
+            results.append(f"{label}: {result:.2f}")
+
+    return ", ".join(results)
@@ -1,11 +1,18 @@
+import codecs
 import os
 import logging
 import uuid
 import asyncio
+import hashlib
+import mmap
+import numpy as np
+import httpx
+from collections import OrderedDict
 from contextlib import asynccontextmanager
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set, Tuple
 
-from fastapi import FastAPI, HTTPException, status, UploadFile, File, Depends
+from fastapi import FastAPI, HTTPException, status, UploadFile, File, Depends, Query
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field
 from mangum import Mangum
 
@@ -17,13 +24,19 @@ from qdrant_client import AsyncQdrantClient
 from qdrant_client.models import (
     VectorParams,
     Distance,
-    PointStruct,
-    Filter,
-    FieldCondition,
-    MatchValue,
+    Batch,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    SearchParams,
+    QuantizationSearchParams,
+    HnswConfigDiff,
+    OptimizersConfigDiff,
 )
 
-from utils import process_markdown_content
+from utils import process_markdown_content, get_splitter
 
 # ------------------------
 # Config & Globals
@@ -32,6 +45,19 @@ from utils import process_markdown_content
 COLLECTION_NAME = "medical_docs"
 VECTOR_SIZE = 768
 MAX_FILES_PER_REQUEST = 5
+# Files of one /ingest request processed at the same time
+INGEST_CONCURRENCY = int(os.environ.get("INGEST_CONCURRENCY", 8))
+# Texts per Gemini embed_content call (API limit is 100), and an estimated
+# token budget per call so a few very long chunks don't overflow one request
+EMBED_BATCH_SIZE = 100
+EMBED_MAX_TOKENS_PER_CALL = 20000
+# Bytes per read when hashing/decoding an upload
+READ_BLOCK_SIZE = 1 << 20
+# Uploads at least this big are memory-mapped instead (Starlette spools
+# uploads over 1 MiB to disk, so these already have a real file behind them)
+MMAP_MIN_SIZE = 1 << 20
+# Points per Qdrant upsert call (bounds request size and peak memory per file)
+UPSERT_BATCH_SIZE = int(os.environ.get("UPSERT_BATCH_SIZE", 256))
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("medical-api")
@@ -40,60 +66,148 @@ GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
 MODEL_ID = os.environ.get("MODEL_ID", "gemini-embedding-001")
 QDRANT_HOST = os.environ.get("QDRANT_HOST", "localhost")
 QDRANT_PORT = int(os.environ.get("QDRANT_PORT", 6333))
+QDRANT_GRPC_PORT = int(os.environ.get("QDRANT_GRPC_PORT", 6334))
 QDRANT_API_KEY = os.environ.get("QDRANT_API_KEY", None)
 
+# HTTP connection pool for the Gemini client (kept alive across warm invocations)
+HTTP_MAX_CONNECTIONS = int(os.environ.get("HTTP_MAX_CONNECTIONS", 100))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get("HTTP_MAX_KEEPALIVE_CONNECTIONS", 50))
+# Retries of failed connection attempts (e.g. a pooled socket reset after a freeze)
+HTTP_CONNECT_RETRIES = int(os.environ.get("HTTP_CONNECT_RETRIES", 2))
+
+# Must match the agent lambda's embedding backend/model
+EMBEDDING_BACKEND = os.environ.get("EMBEDDING_BACKEND", "gemini")
+FASTEMBED_MODEL_ID = os.environ.get("FASTEMBED_MODEL_ID", "BAAI/bge-base-en-v1.5")
+
+# Collection quantization: "int8" (scalar, 4x smaller) or "binary" (32x smaller,
+# pair with a higher SEARCH_OVERSAMPLING on the agent). Only applied at creation.
+QUANTIZATION = os.environ.get("QUANTIZATION", "int8").lower()
+# Bulk-load mode: create the collection with HNSW indexing off so upserts skip
+# graph construction (searches brute-force until then); POST /admin/build-index
+# once the load is done. Only applied at creation.
+DEFER_INDEXING = os.environ.get("DEFER_INDEXING", "false").lower() == "true"
+HNSW_M = 16
+INDEXING_THRESHOLD = 20000  # KB of vectors per segment before it gets an HNSW index
+# Rank on the quantized vectors, then rescore the candidates with the originals
+SEARCH_PARAMS = SearchParams(quantization=QuantizationSearchParams(rescore=True))
+
+# Exact-match embedding cache (16-byte blake2b of the text -> float32 vector,
+# 3 KB each vs ~25 KB as a list of Python floats); oldest entries are evicted
+# first once full. Only touched from the event loop.
+EMBEDDING_CACHE_MAXSIZE = 4096
+_embedding_cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+
 # Global Client placeholders
 global_clients = {
     "qdrant": None,
-    "gemini": None
+    "gemini": None,
+    "embedder": None,
+    # Set once ensure_collection has seen/created the collection; Mangum re-runs
+    # lifespan on every invocation, so warm invocations skip the probe
+    "collection_ready": False
 }
 
 # ------------------------
 # Lifespan (Startup/Shutdown)
 # ------------------------
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    """
-    Handles connection initialization on Lambda Cold Start.
-    """
-    logger.info("🚀 Starting up Medical Ingestion API...")
-    
-    # 1. Initialize Gemini Client
+def init_gemini():
+    """Create the Gemini client (once per container)."""
+    if global_clients["gemini"] is not None:
+        return
     if GEMINI_API_KEY:
         try:
-            # Initialize Gemini Client
-            global_clients["gemini"] = genai.Client(api_key=GEMINI_API_KEY)
+            limits = httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS
+            )
+            # Explicit httpx transports: a keep-alive pool sized by `limits` that
+            # also retries failed connects (the SDK's own retries cover HTTP errors)
+            global_clients["gemini"] = genai.Client(
+                api_key=GEMINI_API_KEY,
+                http_options=types.HttpOptions(
+                    client_args={
+                        "transport": httpx.HTTPTransport(limits=limits, retries=HTTP_CONNECT_RETRIES)
+                    },
+                    async_client_args={
+                        "transport": httpx.AsyncHTTPTransport(limits=limits, retries=HTTP_CONNECT_RETRIES)
+                    }
+                )
+            )
             logger.info("✓ Gemini client initialized")
         except Exception as e:
             logger.error(f"✗ Failed to initialize Gemini: {e}")
     else:
         logger.warning("! GEMINI_API_KEY not found")
 
-    # 2. Initialize Qdrant Client (Async)
+def load_embedder():
+    """Optional local embedder (FastEmbed / ONNX)."""
+    if EMBEDDING_BACKEND != "fastembed" or global_clients["embedder"] is not None:
+        return
     try:
-        client = AsyncQdrantClient(
-            host=QDRANT_HOST, 
-            port=QDRANT_PORT,
-            api_key=QDRANT_API_KEY,
-        )
-        # Quick check
-        await client.get_collections()
-        global_clients["qdrant"] = client
-        logger.info(f"✓ Connected to Qdrant at {QDRANT_HOST}")
+        from fastembed import TextEmbedding
+        global_clients["embedder"] = TextEmbedding(model_name=FASTEMBED_MODEL_ID)
+        logger.info(f"✓ FastEmbed model loaded: {FASTEMBED_MODEL_ID}")
+    except Exception as e:
+        logger.error(f"✗ Failed to load FastEmbed model: {e}")
+
+def load_splitter():
+    """Import + build the markdown splitter ahead of the first /ingest."""
+    try:
+        get_splitter()
+    except Exception as e:
+        logger.error(f"✗ Failed to load markdown splitter: {e}")
+
+async def init_qdrant():
+    """Connect the async Qdrant client (once per container) and make sure the collection exists."""
+    try:
+        client = global_clients["qdrant"]
+        if client is None:
+            # gRPC: binary framing, and concurrent upserts share one HTTP/2 channel
+            client = AsyncQdrantClient(
+                host=QDRANT_HOST, 
+                port=QDRANT_PORT,
+                grpc_port=QDRANT_GRPC_PORT,
+                prefer_grpc=True,
+                api_key=QDRANT_API_KEY,
+            )
+            # Quick check
+            await client.get_collections()
+            global_clients["qdrant"] = client
+            logger.info(f"✓ Connected to Qdrant at {QDRANT_HOST}")
         
-        # Ensure Collection Exists
+        # Ensure Collection Exists: runs every invocation until it succeeds
+        # once, so a failed cold start is retried (a no-op afterwards)
         await ensure_collection(client)
         
     except Exception as e:
-        logger.error(f"✗ Failed to connect to Qdrant: {e}")
+        logger.error(f"✗ Failed to initialize Qdrant: {e}")
 
-    yield
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Handles connection initialization on Lambda Cold Start (a no-op for
+    resources that already exist on warm invocations).
+    """
+    logger.info("🚀 Starting up Medical Ingestion API...")
     
-    # Shutdown logic
-    if global_clients["qdrant"]:
-        await global_clients["qdrant"].close()
-        logger.info("Qdrant connection closed")
+    # Clients are created on the first (cold) invocation only and kept open,
+    # so warm invocations reuse their pooled connections.
+    # 1. Initialize Gemini Client
+    init_gemini()
+
+    # 2. Independent cold-start work runs concurrently: the Qdrant connect +
+    # collection check overlaps the heavy imports/model load on worker threads
+    await asyncio.gather(
+        init_qdrant(),
+        asyncio.to_thread(load_embedder),
+        asyncio.to_thread(load_splitter)
+    )
+
+    yield
+
+    # Clients are intentionally kept open: they are module-level and reused
+    # by the next invocation of this container.
 
 # ------------------------
 # Models
@@ -124,6 +238,7 @@ class SearchResult(BaseModel):
 app = FastAPI(
     title="Medical Document Ingestion API",
     version="1.3.0",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -152,7 +267,9 @@ def get_gemini_client():
     return client
 
 async def ensure_collection(client: AsyncQdrantClient):
-    """Ensures Qdrant collection exists."""
+    """Ensures Qdrant collection exists (probed once per container)."""
+    if global_clients["collection_ready"]:
+        return
     try:
         await client.get_collection(COLLECTION_NAME)
     except Exception:
@@ -162,26 +279,143 @@ async def ensure_collection(client: AsyncQdrantClient):
             vectors_config=VectorParams(
                 size=VECTOR_SIZE,
                 distance=Distance.COSINE,
+                on_disk=True,  # originals on disk, only used for rescoring
             ),
+            quantization_config=quantization_config(),
+            hnsw_config=HnswConfigDiff(m=0) if DEFER_INDEXING else None,
+            optimizers_config=OptimizersConfigDiff(indexing_threshold=0) if DEFER_INDEXING else None,
         )
+    global_clients["collection_ready"] = True
+
+def quantization_config():
+    """Quantized copy of the vectors kept in RAM; originals stay on disk for rescoring."""
+    if QUANTIZATION == "binary":
+        return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+    return ScalarQuantization(
+        scalar=ScalarQuantizationConfig(
+            type=ScalarType.INT8,
+            quantile=0.99,  # clip outliers so they don't stretch the int8 range
+            always_ram=True,
+        )
+    )
 
-def generate_embeddings(client: genai.Client, texts: List[str]) -> List[List[float]]:
-    """Batch embedding using Gemini."""
-    try:
-        result = client.models.embed_content(
-            model=MODEL_ID,
-            contents=texts,
-            config=types.EmbedContentConfig(output_dimensionality=VECTOR_SIZE)
+async def generate_embeddings(client: genai.Client, texts: List[str]) -> np.ndarray:
+    """
+    Batch embedding with an exact-match cache in front: repeated chunks (re-uploads,
+    boilerplate sections) and repeated /search queries only embed their misses.
+    Returns an (N, VECTOR_SIZE) float32 array (0 rows if the service came back short).
+    """
+    keys = [hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest() for text in texts]
+    vectors = np.empty((len(texts), VECTOR_SIZE), dtype=np.float32)
+    # Misses grouped by key, so a text repeated within the batch is embedded once
+    misses: Dict[bytes, List[int]] = {}
+    for i, key in enumerate(keys):
+        vector = _embedding_cache.get(key)
+        if vector is None:
+            misses.setdefault(key, []).append(i)
+        else:
+            vectors[i] = vector
+    if not misses:
+        return vectors
+
+    fresh = await _embed_uncached(client, [texts[rows[0]] for rows in misses.values()])
+    if len(fresh) < len(misses):
+        return vectors[:0]
+
+    for (key, rows), vector in zip(misses.items(), fresh):
+        vectors[rows] = vector
+        _embedding_cache[key] = vector.copy()  # own buffer, not a view into `fresh`
+        _embedding_cache.move_to_end(key)
+    while len(_embedding_cache) > EMBEDDING_CACHE_MAXSIZE:
+        _embedding_cache.popitem(last=False)
+    return vectors
+
+def pack_batches(
+    texts: List[str],
+    max_texts: int = EMBED_BATCH_SIZE,
+    max_tokens: int = EMBED_MAX_TOKENS_PER_CALL
+) -> List[Tuple[int, int]]:
+    """
+    Greedy [start, end) ranges over `texts`, each within the per-call text count
+    and (estimated, ~4 chars per token) token budget; an oversized text gets a
+    range of its own.
+    """
+    ranges = []
+    start, tokens = 0, 0
+    for i, text in enumerate(texts):
+        n = len(text) // 4 + 1
+        if i > start and (i - start == max_texts or tokens + n > max_tokens):
+            ranges.append((start, i))
+            start, tokens = i, 0
+        tokens += n
+    if start < len(texts):
+        ranges.append((start, len(texts)))
+    return ranges
+
+async def _embed_uncached(client: genai.Client, texts: List[str]) -> np.ndarray:
+    """Batch embedding using Gemini (or the local FastEmbed model when configured)."""
+    embedder = global_clients.get("embedder")
+    if embedder is not None:
+        # Local ONNX inference is CPU-bound -> ThreadPool
+        return await asyncio.to_thread(
+            lambda: np.asarray(list(embedder.embed(texts)), dtype=np.float32)
         )
-        if hasattr(result, 'embeddings'):
-            return [emb.values for emb in result.embeddings]
-        return []
+
+    try:
+        # The API caps texts and tokens per call: split into sub-batches sent concurrently
+        config = types.EmbedContentConfig(output_dimensionality=VECTOR_SIZE)
+        results = await asyncio.gather(*(
+            client.aio.models.embed_content(
+                model=MODEL_ID,
+                contents=texts[start:end],
+                config=config
+            )
+            for start, end in pack_batches(texts)
+        ))
+        vectors = []
+        for result in results:
+            embeddings = getattr(result, 'embeddings', None) or []
+            vectors.extend(emb.values for emb in embeddings)
+        if not vectors:
+            return np.empty((0, VECTOR_SIZE), dtype=np.float32)
+        return np.asarray(vectors, dtype=np.float32)
     except Exception as e:
         logger.error(f"Embedding error: {e}")
         raise HTTPException(status_code=500, detail=f"Embedding failed: {str(e)}")
 
+# SHA-1 state with the namespace already absorbed; copying it per id skips
+# re-hashing the prefix (same ids as uuid.uuid5(uuid.NAMESPACE_DNS, ...)).
+_UUID5_NAMESPACE = hashlib.sha1(uuid.NAMESPACE_DNS.bytes)
+
+def _uuid5_str(h) -> str:
+    """Format a finished uuid5 SHA-1 state as the canonical UUID string."""
+    b = bytearray(h.digest()[:16])
+    b[6] = b[6] & 0x0F | 0x50  # version 5
+    b[8] = b[8] & 0x3F | 0x80  # RFC 4122 variant
+    x = b.hex()
+    return f"{x[:8]}-{x[8:12]}-{x[12:16]}-{x[16:20]}-{x[20:]}"
+
 def generate_deterministic_uuid(input_str: str) -> str:
-    return str(uuid.uuid5(uuid.NAMESPACE_DNS, input_str))
+    h = _UUID5_NAMESPACE.copy()
+    h.update(input_str.encode("utf-8"))
+    return _uuid5_str(h)
+
+def chunk_uuids(file_hash: str, start: int, end: int) -> List[str]:
+    """
+    Point ids of chunks [start, end) of a file, i.e. generate_deterministic_uuid(
+    f"{file_hash}_{i}"), with the namespace + file hash prefix hashed only once.
+    """
+    base = _UUID5_NAMESPACE.copy()
+    base.update(f"{file_hash}_".encode("utf-8"))
+    ids = []
+    for i in range(start, end):
+        h = base.copy()
+        h.update(str(i).encode())
+        ids.append(_uuid5_str(h))
+    return ids
+
+# Every casing of ".md": one endswith() call, no lowercased copy of the name
+_MD_SUFFIXES = ('.md', '.MD', '.Md', '.mD')
 
 def validate_files(files: List[UploadFile], max_files: int = MAX_FILES_PER_REQUEST) -> None:
     """Validates uploaded files for count and extension."""
@@ -203,91 +437,135 @@ def validate_files(files: List[UploadFile], max_files: int = MAX_FILES_PER_REQUE
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="File with missing filename detected"
             )
-        if not file.filename.lower().endswith('.md'):
+        if not file.filename.endswith(_MD_SUFFIXES):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Only .md (Markdown) files are allowed. Invalid file: {file.filename}"
             )
 
-async def process_single_file(
-    file: UploadFile,
-    q_client: AsyncQdrantClient,
-    g_client: genai.Client
-) -> Dict[str, Any]:
-    """Process a single file: read, chunk, embed, and upsert to Qdrant."""
-    try:
-        # 1. Read and Process (CPU bound -> ThreadPool)
-        content_bytes = await file.read()
-        raw_content = content_bytes.decode("utf-8")
-        
-        processed = await asyncio.to_thread(
-            process_markdown_content, raw_content, file.filename
-        )
-        
-        file_hash = processed["file_hash"]
-        doc_id = processed["document_id"]
-
-        # 2. Check for Duplicates
-        existing_count = await q_client.count(
-            collection_name=COLLECTION_NAME,
-            count_filter=Filter(
-                must=[FieldCondition(key="file_hash", match=MatchValue(value=file_hash))]
-            )
-        )
-        
-        if existing_count.count > 0:
-            return {
-                "file": file.filename, 
-                "status": "skipped", 
-                "reason": "Duplicate SHA256"
-            }
-
-        # 3. Generate Embeddings (Network/CPU bound -> ThreadPool)
-        texts = [c["content"] for c in processed["chunks"]]
-        if not texts:
-            return {
-                "file": file.filename, 
-                "status": "skipped", 
-                "reason": "Empty content"
-            }
-
-        embeddings = await asyncio.to_thread(generate_embeddings, g_client, texts)
-
-        # 4. Prepare Points
-        points = []
-        for i, (chunk, vector) in enumerate(zip(processed["chunks"], embeddings)):
-            point_id = generate_deterministic_uuid(f"{file_hash}_{i}")
-            
-            payload = {
+def _read_and_chunk(file: UploadFile) -> Dict[str, Any]:
+    if file.size and file.size >= MMAP_MIN_SIZE:
+        # Large uploads are already spooled to disk: map the file, SHA-256 the
+        # mapping and decode it straight into one str (no bytes copy at all)
+        file.file.flush()
+        with mmap.mmap(file.file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            file_hash = hashlib.sha256(mapped).hexdigest()
+            raw_content = str(mapped, "utf-8")
+        return process_markdown_content(raw_content, file.filename, file_hash=file_hash)
+
+    # One pass over the spooled upload in blocks: SHA-256 the raw bytes (no
+    # re-encode of the decoded text) and decode incrementally, so the whole
+    # body never sits in memory as bytes and str at once
+    hasher = hashlib.sha256()
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    parts = []
+    for block in iter(lambda: file.file.read(READ_BLOCK_SIZE), b""):
+        hasher.update(block)
+        parts.append(decoder.decode(block))
+    parts.append(decoder.decode(b"", final=True))
+    return process_markdown_content("".join(parts), file.filename, file_hash=hasher.hexdigest())
+
+async def prepare_file(file: UploadFile) -> Dict[str, Any]:
+    """Read and chunk one upload (decode + CPU-bound split run on the thread pool)."""
+    return await asyncio.to_thread(_read_and_chunk, file)
+
+async def find_ingested(q_client: AsyncQdrantClient, file_hashes: List[str]) -> Set[str]:
+    """
+    Which of `file_hashes` are already in the collection, in ONE round-trip: a
+    file's first chunk always gets the deterministic id of f"{file_hash}_0", so
+    a point-id retrieve replaces one payload-filtered count per file.
+    Always asks Qdrant: other containers and /admin/reset change the collection.
+    """
+    if not file_hashes:
+        return set()
+    first_chunk_ids = {generate_deterministic_uuid(f"{h}_0"): h for h in file_hashes}
+    records = await q_client.retrieve(
+        collection_name=COLLECTION_NAME,
+        ids=list(first_chunk_ids),
+        with_payload=False,
+        with_vectors=False,
+    )
+    return {first_chunk_ids[str(record.id)] for record in records}
+
+def _chunk_batch(
+    file_name: str,
+    processed: Dict[str, Any],
+    embeddings: np.ndarray,
+    start: int,
+    end: int
+) -> Batch:
+    """Column-wise Batch (ids / vectors / payloads) for chunks [start, end) of one file."""
+    # The last batch is short: ids, vectors and payloads must all stop at the file's end
+    end = min(end, len(processed["chunks"]))
+    file_hash = processed["file_hash"]
+    doc_id = processed["document_id"]
+    return Batch(
+        ids=chunk_uuids(file_hash, start, end),
+        # Qdrant stores float32 anyway; tolist() runs in C
+        vectors=embeddings[start:end].tolist(),
+        payloads=[
+            {
                 "file_hash": file_hash,
                 "document_id": doc_id,
                 "text": chunk["content"],
                 "chunk_index": chunk["chunk_index"],
-                "section": chunk["metadata"].get("Section", "General"),
-                "patient_id": chunk["metadata"].get("patient_id"),
-                "clinician_id": chunk["metadata"].get("clinician_id"),
-                "file_name": file.filename
+                "section": metadata.get("Section", "General"),
+                "patient_id": metadata.get("patient_id"),
+                "clinician_id": metadata.get("clinician_id"),
+                "file_name": file_name
             }
-            
-            points.append(PointStruct(id=point_id, vector=vector, payload=payload))
+            for chunk in processed["chunks"][start:end]
+            for metadata in (chunk["metadata"],)  # bound once per chunk
+        ],
+    )
 
-        # 5. Upsert
+async def process_single_file(
+    file_name: str,
+    processed: Dict[str, Any],
+    embeddings: np.ndarray,
+    q_client: AsyncQdrantClient,
+    sync: bool = True
+) -> Dict[str, Any]:
+    """
+    Upsert the embedded chunks of one new (non-duplicate) file. With sync=False
+    it returns once Qdrant has the whole file in its WAL (durable, not yet
+    indexed/searchable).
+    """
+    try:
+        doc_id = processed["document_id"]
+        chunks = processed["chunks"]
+        starts = range(0, len(chunks), UPSERT_BATCH_SIZE)
+
+        # Upsert in batches, last batch first. All but the final one use
+        # wait=False: Qdrant acks once the batch is in its WAL instead of after
+        # indexing it.
+        for start in reversed(starts[1:]):
+            await q_client.upsert(
+                collection_name=COLLECTION_NAME,
+                points=_chunk_batch(file_name, processed, embeddings, start, start + UPSERT_BATCH_SIZE),
+                wait=False
+            )
+        # The batch holding chunk 0 (the duplicate-check marker, see
+        # find_ingested) goes last, with wait=True when sync. Updates are
+        # applied in WAL order, so once it returns the whole file is
+        # searchable, and a failure before it leaves the file retryable.
         await q_client.upsert(
             collection_name=COLLECTION_NAME,
-            points=points
+            points=_chunk_batch(file_name, processed, embeddings, 0, UPSERT_BATCH_SIZE),
+            wait=sync
         )
 
         return {
-            "file": file.filename, 
+            "file": file_name, 
             "doc_id": doc_id, 
             "status": "success", 
-            "chunks": len(points)
+            "chunks": len(chunks)
         }
 
     except Exception as e:
-        logger.error(f"Error processing {file.filename}: {e}", exc_info=True)
+        logger.error(f"Error processing {file_name}: {e}", exc_info=True)
         return {
-            "file": file.filename, 
+            "file": file_name, 
             "status": "error", 
             "message": str(e)
         }
@@ -322,7 +600,8 @@ async def health_check():
 async def ingest_markdowns(
     files: List[UploadFile] = File(..., description=f"Upload 1-{MAX_FILES_PER_REQUEST} markdown (.md) files"),
     q_client: AsyncQdrantClient = Depends(get_qdrant_client),
-    g_client: genai.Client = Depends(get_gemini_client)
+    g_client: genai.Client = Depends(get_gemini_client),
+    sync: bool = Query(True, description="Wait until the documents are indexed and searchable")
 ):
     """
     Ingest multiple markdown files (up to 5) into the vector database.
@@ -330,26 +609,80 @@ async def ingest_markdowns(
     - Files are processed concurrently for better performance
     - Only .md files are accepted
     - Duplicate files (based on SHA256 hash) are automatically skipped
+    - `sync=false` responds once Qdrant has durably accepted the points, before
+      they are indexed (searchable shortly after)
     """
     # Validate files before processing
     validate_files(files)
     
-    # Process all files concurrently
-    tasks = [
-        process_single_file(file, q_client, g_client)
-        for file in files
-    ]
-    
-    results = await asyncio.gather(*tasks)
+    # Read + chunk all files concurrently
+    prepared = await asyncio.gather(
+        *(prepare_file(file) for file in files), return_exceptions=True
+    )
+
+    # Duplicate check for the whole batch in one Qdrant call
+    file_hashes = [p["file_hash"] for p in prepared if not isinstance(p, BaseException)]
+    try:
+        existing = await find_ingested(q_client, file_hashes)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Duplicate check failed: {e}")
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(files)
+    pending = []
+    for i, (file, processed) in enumerate(zip(files, prepared)):
+        if isinstance(processed, BaseException):
+            logger.error(f"Error processing {file.filename}: {processed}")
+            results[i] = {"file": file.filename, "status": "error", "message": str(processed)}
+        elif processed["file_hash"] in existing:
+            results[i] = {"file": file.filename, "status": "skipped", "reason": "Duplicate SHA256"}
+        elif not processed["chunks"]:
+            results[i] = {"file": file.filename, "status": "skipped", "reason": "Empty content"}
+        else:
+            existing.add(processed["file_hash"])  # same content twice in one request
+            pending.append((i, file.filename, processed))
+
+    # One embedding pass over the chunks of every new file, instead of a
+    # round-trip per file; each file then takes its slice back by offset
+    all_texts = [c["content"] for _, _, processed in pending for c in processed["chunks"]]
+    embeddings = np.empty((0, VECTOR_SIZE), dtype=np.float32)
+    if all_texts:
+        try:
+            embeddings = await generate_embeddings(g_client, all_texts)
+            if len(embeddings) != len(all_texts):
+                raise ValueError("Embedding service returned fewer vectors than texts")
+        except Exception as e:
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            logger.error(f"Embedding failed for {len(pending)} files: {detail}")
+            for i, file_name, _ in pending:
+                results[i] = {"file": file_name, "status": "error", "message": detail}
+            pending = []
+
+    # Upsert the new files concurrently, capped so a large batch can't burst
+    # Qdrant (failures come back as results)
+    semaphore = asyncio.Semaphore(INGEST_CONCURRENCY)
+
+    async def process_limited(
+        file_name: str, processed: Dict[str, Any], vectors: np.ndarray
+    ) -> Dict[str, Any]:
+        async with semaphore:
+            return await process_single_file(file_name, processed, vectors, q_client, sync)
+
+    tasks = []
+    offset = 0
+    for _, file_name, processed in pending:
+        n = len(processed["chunks"])
+        tasks.append(process_limited(file_name, processed, embeddings[offset:offset + n]))
+        offset += n
+
+    for (i, _, _), result in zip(pending, await asyncio.gather(*tasks)):
+        results[i] = result
     
     # Generate summary statistics
-    summary = {
-        "total": len(results),
-        "success": sum(1 for r in results if r["status"] == "success"),
-        "skipped": sum(1 for r in results if r["status"] == "skipped"),
-        "error": sum(1 for r in results if r["status"] == "error"),
-        "total_chunks": sum(r.get("chunks", 0) for r in results if r["status"] == "success")
-    }
+    summary = {"total": len(results), "success": 0, "skipped": 0, "error": 0, "total_chunks": 0}
+    for r in results:
+        summary[r["status"]] += 1
+        if r["status"] == "success":
+            summary["total_chunks"] += r.get("chunks", 0)
     
     logger.info(f"Batch ingestion complete: {summary}")
     
@@ -366,18 +699,19 @@ async def search_documents(
     g_client: genai.Client = Depends(get_gemini_client)
 ):
     # 1. Embed Query
-    query_embeddings = await asyncio.to_thread(generate_embeddings, g_client, [query])
-    if not query_embeddings:
+    query_embeddings = await generate_embeddings(g_client, [query])
+    if len(query_embeddings) == 0:
         raise HTTPException(status_code=500, detail="Failed to embed query")
     
-    query_vector = query_embeddings[0]
+    query_vector = query_embeddings[0].tolist()
 
     # 2. Search Qdrant (Async) using query_points
     response = await q_client.query_points(
         collection_name=COLLECTION_NAME,
         query=query_vector,
         limit=limit,
-        with_payload=True
+        search_params=SEARCH_PARAMS,
+        with_payload=["text", "document_id", "section", "file_name", "patient_id", "clinician_id"]
     )
 
     # 3. Format
@@ -396,11 +730,25 @@ async def search_documents(
 
     return {"query": query, "results": results}
 
+@app.post("/admin/build-index", tags=["Admin"])
+async def build_index(q_client: AsyncQdrantClient = Depends(get_qdrant_client)):
+    """Turns HNSW indexing (back) on after a bulk load; Qdrant builds it in the background."""
+    try:
+        await q_client.update_collection(
+            collection_name=COLLECTION_NAME,
+            hnsw_config=HnswConfigDiff(m=HNSW_M),
+            optimizers_config=OptimizersConfigDiff(indexing_threshold=INDEXING_THRESHOLD),
+        )
+        return {"message": "Index build scheduled"}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.delete("/admin/reset", tags=["Admin"])
 async def reset_collection(q_client: AsyncQdrantClient = Depends(get_qdrant_client)):
     """Deletes and recreates the collection (useful for dev/testing)."""
     try:
         await q_client.delete_collection(COLLECTION_NAME)
+        global_clients["collection_ready"] = False
         await ensure_collection(q_client)
         return {"message": "Collection reset successfully"}
     except Exception as e:
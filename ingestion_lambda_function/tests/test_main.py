@@ -0,0 +1,79 @@
+import asyncio
+
+import numpy as np
+
+import main
+
+
+class RecordingClient:
+    """Stands in for AsyncQdrantClient: keeps every upserted Batch."""
+
+    def __init__(self):
+        self.batches = []
+
+    async def upsert(self, collection_name, points, wait):
+        self.batches.append(points)
+
+
+def _processed(n_chunks: int) -> dict:
+    return {
+        "file_hash": "f" * 64,
+        "document_id": "doc",
+        "chunks": [
+            {"content": f"chunk {i}", "chunk_index": i, "metadata": {"Section": "S"}}
+            for i in range(n_chunks)
+        ],
+    }
+
+
+def _upsert(n_chunks: int) -> list:
+    client = RecordingClient()
+    embeddings = np.ones((n_chunks, 4), dtype=np.float32)
+    result = asyncio.run(
+        main.process_single_file("a.md", _processed(n_chunks), embeddings, client)
+    )
+    assert result["status"] == "success", result
+    return client.batches
+
+
+def test_short_file_batch_columns_match():
+    (batch,) = _upsert(3)
+    assert len(batch.ids) == len(batch.vectors) == len(batch.payloads) == 3
+
+
+def test_partial_last_batch_columns_match():
+    n_chunks = main.UPSERT_BATCH_SIZE + 5
+    batches = _upsert(n_chunks)
+    for batch in batches:
+        assert len(batch.ids) == len(batch.vectors) == len(batch.payloads)
+    ids = [point_id for batch in batches for point_id in batch.ids]
+    assert len(set(ids)) == n_chunks
+
+
+class FlakyCreateClient:
+    """Collection is missing and the first create_collection call times out."""
+
+    def __init__(self):
+        self.create_calls = 0
+
+    async def get_collection(self, collection_name):
+        raise RuntimeError("not found")
+
+    async def create_collection(self, **kwargs):
+        self.create_calls += 1
+        if self.create_calls == 1:
+            raise TimeoutError("create timed out")
+
+
+def test_init_qdrant_retries_failed_collection_setup(monkeypatch):
+    client = FlakyCreateClient()
+    monkeypatch.setitem(main.global_clients, "qdrant", client)
+    monkeypatch.setitem(main.global_clients, "collection_ready", False)
+
+    asyncio.run(main.init_qdrant())
+    assert not main.global_clients["collection_ready"]
+
+    # Next (warm) invocation retries instead of keeping the half-initialized state
+    asyncio.run(main.init_qdrant())
+    assert main.global_clients["collection_ready"]
+    assert client.create_calls == 2
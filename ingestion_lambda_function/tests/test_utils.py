@@ -0,0 +1,20 @@
+import utils
+
+
+def _splitter_chunks(content: str) -> list:
+    return [doc.page_content for doc in utils.get_splitter().split_text(content)]
+
+
+def _chunks(content: str) -> list:
+    return [chunk["content"] for chunk in utils.process_markdown_content(content, "a.md")["chunks"]]
+
+
+def test_plain_text_fast_path_matches_splitter():
+    content = "**Patient ID:** PT-123\n  first line \n\n\n second\tparagraph\r\nend\n"
+    assert _chunks(content) == _splitter_chunks(content)
+
+
+def test_fence_joined_by_dropped_non_printable_matches_splitter():
+    # The splitter drops the \xa0, which turns "`\xa0``" into a ``` fence
+    content = "intro\n`\xa0``\ncode  line\n\nmore\n`\xa0``\nafter\n"
+    assert _chunks(content) == _splitter_chunks(content)
@@ -1,7 +1,43 @@
 import re
 import hashlib
-from typing import List, Dict, Any
-from langchain_text_splitters import MarkdownHeaderTextSplitter
+import threading
+from typing import List, Dict, Any, Optional
+
+# Compiled once at import (cold start) instead of per file
+_CLEAN_RE = re.compile(r"[\*#:]")
+# All "**Key:** Value" fields in one alternation, so the document is scanned
+# once. The value sits in a lookahead: a match ends right after the key, so a
+# second field on the same line is still found (as with separate searches).
+_FIELD_RE = re.compile(
+    r"\*\*(?P<key>Document ID|Patient ID|Clinician ID|Date Created):?\*\*\s*(?=(?P<value>[^\n]+))",
+    re.IGNORECASE
+)
+_FIELD_KEYS = {
+    "document id": "document_id",
+    "patient id": "patient_id",
+    "clinician id": "clinician_id",
+    "date created": "date_created"
+}
+_H1_RE = re.compile(r"^#\s*[^:\-\n]+[:\-]\s*([^\n]+)", re.MULTILINE)
+
+# Shared splitter, created on first use: langchain_text_splitters is a heavy
+# import, so it is kept off module import (lifespan preloads it on a worker
+# thread). It only holds configuration, so concurrent split_text calls from
+# worker threads are safe.
+_SPLITTER = None
+_splitter_lock = threading.Lock()
+
+def get_splitter():
+    global _SPLITTER
+    if _SPLITTER is None:
+        with _splitter_lock:
+            if _SPLITTER is None:
+                from langchain_text_splitters import MarkdownHeaderTextSplitter
+                _SPLITTER = MarkdownHeaderTextSplitter(
+                    headers_to_split_on=[("#", "Title"), ("##", "Section")],
+                    strip_headers=False
+                )
+    return _SPLITTER
 
 def clean_value(value: str) -> str:
     """
@@ -11,7 +47,7 @@ def clean_value(value: str) -> str:
     if not value:
         return "Unknown"
     # Remove stars, hashes, and colons. Keep underscores.
-    cleaned = re.sub(r"[\*#:]", "", value).strip()
+    cleaned = _CLEAN_RE.sub("", value).strip()
     return cleaned if cleaned else "Unknown"
 
 def compute_sha256(content: str) -> str:
@@ -29,47 +65,79 @@ def extract_metadata(content: str) -> Dict[str, str]:
         "date_created": "Unknown"
     }
     
-    # 1. DOCUMENT ID
-    # Look for "**Document ID:** 123"
-    doc_id_match = re.search(r"\*\*Document ID:?\*\*\s*([^\n]+)", content, re.IGNORECASE)
-    if doc_id_match:
-        metadata["document_id"] = clean_value(doc_id_match.group(1))
+    # 1. "**Key:** Value" fields inside lists or standalone lines, single pass;
+    # the first occurrence of each key wins
+    found = {}
+    for match in _FIELD_RE.finditer(content):
+        key = _FIELD_KEYS[match.group("key").lower()]
+        if key not in found:
+            found[key] = match.group("value")
+            if len(found) == len(_FIELD_KEYS):
+                break
+    for key, value in found.items():
+        metadata[key] = clean_value(value)
 
-    # Fallback: Header 1 "Report - 123" or "Report: 123"
+    # 2. Fallback for DOCUMENT ID: Header 1 "Report - 123" or "Report: 123"
     if metadata["document_id"] == "Unknown":
-        h1_match = re.search(r"^#\s*[^:\-\n]+[:\-]\s*([^\n]+)", content, re.MULTILINE)
+        h1_match = _H1_RE.search(content)
         if h1_match:
             metadata["document_id"] = clean_value(h1_match.group(1))
 
-    # 2. OTHER FIELDS (Patient, Clinician, Date)
-    # Matches "**Key:** Value" inside lists or standalone lines
-    fields = {
-        "patient_id": r"\*\*Patient ID:?\*\*\s*([^\n]+)",
-        "clinician_id": r"\*\*Clinician ID:?\*\*\s*([^\n]+)",
-        "date_created": r"\*\*Date Created:?\*\*\s*([^\n]+)"
-    }
-    
-    for key, pattern in fields.items():
-        match = re.search(pattern, content, re.IGNORECASE)
-        if match:
-            metadata[key] = clean_value(match.group(1))
-
     return metadata
 
-def process_markdown_content(content: str, filename: str) -> Dict[str, Any]:
+def _join_plain_paragraphs(content: str) -> Optional[str]:
+    """
+    What the splitter returns for text without headers or code fences: each
+    line stripped (and non-printables dropped), blank lines separating
+    paragraphs, paragraphs joined with a markdown line break. Returns None if
+    a cleaned line holds a fence: dropping a non-printable can join one
+    ("`\\xa0``"), so the check has to run on the text the splitter sees.
+    """
+    paragraphs = []
+    current = []
+    for line in content.split("\n"):
+        line = line.strip()
+        if not line.isprintable():
+            line = "".join(filter(str.isprintable, line))
+        if "```" in line or "~~~" in line:
+            return None
+        if line:
+            current.append(line)
+        elif current:
+            paragraphs.append("\n".join(current))
+            current = []
+    if current:
+        paragraphs.append("\n".join(current))
+    return "  \n".join(paragraphs)
+
+def process_markdown_content(
+    content: str, filename: str, file_hash: Optional[str] = None
+) -> Dict[str, Any]:
     """
     Splits markdown into chunks and attaches metadata/hashes.
+    Pass `file_hash` when the SHA-256 of the raw UTF-8 bytes is already known.
     """
-    file_hash = compute_sha256(content)
+    if file_hash is None:
+        file_hash = compute_sha256(content)
     global_meta = extract_metadata(content)
 
-    headers_to_split_on = [("#", "Title"), ("##", "Section")]
-    
+    # Fast path: with no "#" and no code fences there is nothing to split on,
+    # so build the splitter's single chunk directly
+    text = None if "#" in content else _join_plain_paragraphs(content)
+    if text is not None:
+        return {
+            "file_hash": file_hash,
+            "document_id": global_meta["document_id"],
+            "chunks": [{
+                "content": text,
+                "chunk_index": 0,
+                "metadata": global_meta.copy(),
+                "file_hash": file_hash
+            }] if text else []
+        }
+
+    splitter = get_splitter()
     try:
-        splitter = MarkdownHeaderTextSplitter(
-            headers_to_split_on=headers_to_split_on,
-            strip_headers=False
-        )
         splits = splitter.split_text(content)
     except Exception:
         # Fallback if splitting fails
@@ -2,7 +2,7 @@ resource "aws_lambda_function" "python_lambda" {
   function_name = "agent-lambda"
   role          = aws_iam_role.lambda_role.arn
   runtime       = "python3.12"
-  handler       = "main2.handler"
+  handler       = "main.handler"
   timeout       = 300
 
   memory_size = 1024
@@ -18,9 +18,11 @@ resource "aws_lambda_function" "python_lambda" {
       GEMINI_API_KEY     = var.gemini_api_key
       QDRANT_HOST         = "qdrant"
       QDRANT_PORT         = "6333"
+      QDRANT_GRPC_PORT    = "6334"
       #MODEL_ID           = "gemini-2.5-flash-lite"
       MODEL_ID           = "gemini-3-flash-preview"
       EMBEDDING_MODEL_ID = "gemini-embedding-001"
+      OMP_NUM_THREADS    = "1"
     }
   }
 }